@@ -1,12 +1,31 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, request
 import chess
+import orjson
 import os  # Required for environment variables
-from strong_engine import StrongChessEngine
+import threading
+from strong_engine import StrongChessEngine, random_legal_move
 
 app = Flask(__name__)
 
-# Initialize strong engine
+# Initialize strong engine (once, in the gunicorn master when preloaded)
 chess_engine = StrongChessEngine(difficulty=3)
+# The engine keeps per-search state, so threads of a worker take turns using it
+engine_lock = threading.Lock()
+
+def fast_json(obj):
+    """Build a JSON response with orjson (drop-in replacement for jsonify)"""
+    return app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+# One scratch board per worker thread, refilled with set_fen() on each request
+_thread_local = threading.local()
+
+def get_board(fen):
+    """Return this thread's reusable board set to the given FEN"""
+    board = getattr(_thread_local, 'board', None)
+    if board is None:
+        board = _thread_local.board = chess.Board()
+    board.set_fen(fen)
+    return board
 
 @app.route('/')
 def index():
@@ -19,28 +38,28 @@ def get_bot_move():
     difficulty = data.get('difficulty', 3)
     
     try:
-        # Update engine difficulty - use update_depth() method
-        chess_engine.difficulty = difficulty
-        chess_engine.update_depth()  # This sets all search parameters correctly
-        
-        # Get best move
-        from_sq, to_sq, promotion = chess_engine.get_best_move(fen)
+        with engine_lock:
+            # Update engine difficulty - use update_depth() method
+            chess_engine.difficulty = difficulty
+            chess_engine.update_depth()  # This sets all search parameters correctly
+            
+            # Get best move
+            from_sq, to_sq, promotion = chess_engine.get_best_move(fen)
         
         if from_sq and to_sq:
-            return jsonify({
+            return fast_json({
                 'from_square': from_sq,
                 'to_square': to_sq,
                 'promotion': promotion
             })
         else:
             # Simple fallback
-            board = chess.Board(fen)
-            import random
+            board = get_board(fen)
             if board.is_game_over():
-                return jsonify({'error': 'Game is over'}), 400
+                return fast_json({'error': 'Game is over'}), 400
             
-            move = random.choice(list(board.legal_moves))
-            return jsonify({
+            move = random_legal_move(board)
+            return fast_json({
                 'from_square': chess.square_name(move.from_square),
                 'to_square': chess.square_name(move.to_square),
                 'promotion': chess.piece_symbol(move.promotion).lower() if move.promotion else None
@@ -50,7 +69,7 @@ def get_bot_move():
         print(f"Error in get_bot_move: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 400
+        return fast_json({'error': str(e)}), 400
 
 @app.route('/get_legal_moves', methods=['POST'])
 def get_legal_moves():
@@ -59,21 +78,19 @@ def get_legal_moves():
     square = data.get('square')
     
     try:
-        board = chess.Board(fen)
-        moves = []
+        board = get_board(fen)
         
         if square:
-            from_square = chess.parse_square(square)
-            for move in board.legal_moves:
-                if move.from_square == from_square:
-                    moves.append(chess.square_name(move.to_square))
+            # Only generate moves of the piece on that square
+            from_mask = chess.BB_SQUARES[chess.parse_square(square)]
+            moves = [chess.SQUARE_NAMES[move.to_square]
+                     for move in board.generate_legal_moves(from_mask=from_mask)]
         else:
-            for move in board.legal_moves:
-                moves.append(chess.square_name(move.to_square))
+            moves = [chess.SQUARE_NAMES[move.to_square] for move in board.legal_moves]
         
-        return jsonify({'legal_moves': moves})
+        return fast_json({'legal_moves': moves})
     except Exception as e:
-        return jsonify({'error': str(e)}), 400
+        return fast_json({'error': str(e)}), 400
 
 @app.route('/validate_move', methods=['POST'])
 def validate_move():
@@ -84,19 +101,20 @@ def validate_move():
     promotion = data.get('promotion')
     
     try:
-        board = chess.Board(fen)
+        board = get_board(fen)
         
         # Check if this is a pawn promotion move
-        piece = board.piece_at(chess.parse_square(from_sq))
-        is_pawn = piece and piece.piece_type == chess.PAWN
+        from_square = chess.parse_square(from_sq)
+        is_pawn = board.piece_type_at(from_square) == chess.PAWN
+        color = board.color_at(from_square)
         target_rank = chess.square_rank(chess.parse_square(to_sq))
         
         # Determine if move requires promotion
-        if is_pawn and ((piece.color == chess.WHITE and target_rank == 7) or 
-                       (piece.color == chess.BLACK and target_rank == 0)):
+        if is_pawn and ((color == chess.WHITE and target_rank == 7) or 
+                       (color == chess.BLACK and target_rank == 0)):
             # If promotion is not specified, we need to ask for it
             if not promotion:
-                return jsonify({
+                return fast_json({
                     'valid': False, 
                     'requires_promotion': True,
                     'error': 'Pawn promotion required'
@@ -108,7 +126,7 @@ def validate_move():
         
         if move in board.legal_moves:
             board.push(move)
-            return jsonify({
+            return fast_json({
                 'valid': True,
                 'fen': board.fen(),
                 'check': board.is_check(),
@@ -118,9 +136,9 @@ def validate_move():
                 'promotion_made': promotion if promotion else None
             })
         else:
-            return jsonify({'valid': False, 'error': 'Illegal move'})
+            return fast_json({'valid': False, 'error': 'Illegal move'})
     except Exception as e:
-        return jsonify({'valid': False, 'error': str(e)})
+        return fast_json({'valid': False, 'error': str(e)})
 
 if __name__ == '__main__':
     print("🚀 Starting Modern Chess Game Server...")
@@ -4,10 +4,134 @@ Compatible with the Flask web interface
 """
 
 import chess
-import math
+import chess.polyglot
+import contextlib
+import io
+import multiprocessing
+import os
 import random
 import time
-from typing import List, Tuple, Optional, Dict
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from operator import itemgetter
+from typing import List, Tuple, Optional, Dict, Iterator
+
+# Search bound larger than any score (integer centipawns throughout)
+INF = 10**9
+
+# Being mated at ply p scores -(MATE_SCORE - p); anything beyond MATE_THRESHOLD is a mate
+MATE_SCORE = 100000
+MATE_THRESHOLD = 90000
+
+# Deepest alpha-beta ply (sizes the per-ply killer slots; quiescence never uses them)
+MAX_PLY = 64
+
+# Transposition table bound flags
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+# Optional Polyglot opening book, used only if the file is present
+BOOK_PATH = os.environ.get("CHESS_BOOK", os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin"))
+
+# Zobrist keys taken from the Polyglot random array, so hashes match chess.polyglot.
+# Piece keys are indexed [color][piece_type][square] (piece_type 0 is unused).
+_POLYGLOT = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+ZOBRIST_PIECE = [
+    [[0] * 64] + [[_POLYGLOT[64 * ((piece_type - 1) * 2 + color) + square] for square in range(64)]
+                  for piece_type in chess.PIECE_TYPES]
+    for color in chess.COLORS[::-1]  # index 0 = BLACK, 1 = WHITE
+]
+
+
+def _castling_keys() -> Dict[int, int]:
+    """Map every subset of rook corners (castling_rights bits) to its Zobrist key."""
+    keys = {}
+    corners = (chess.BB_H1, chess.BB_A1, chess.BB_H8, chess.BB_A8)
+    for rights in range(16):
+        mask = key = 0
+        for bit, corner in enumerate(corners):
+            if rights & (1 << bit):
+                mask |= corner
+                key ^= _POLYGLOT[768 + bit]
+        keys[mask] = key
+    return keys
+
+
+ZOBRIST_CASTLING = _castling_keys()
+ZOBRIST_EP = _POLYGLOT[772:780]  # by en passant file
+ZOBRIST_TURN = _POLYGLOT[780]    # white to move
+
+# Move ordering masks: the 16 central squares c3-f6 and the minor pieces' home squares
+BB_CENTER_16 = chess.SquareSet(chess.square(file, rank) for file in range(2, 6) for rank in range(2, 6)).mask
+BB_MINOR_HOMES = chess.SquareSet([chess.B1, chess.G1, chess.B8, chess.G8,
+                                  chess.C1, chess.F1, chess.C8, chess.F8]).mask
+
+
+def encode_move(move: chess.Move) -> int:
+    """Pack a move into one int: from | to << 6 | promotion << 12 (0 never encodes a real move)."""
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def random_legal_move(board: chess.Board) -> Optional[chess.Move]:
+    """Pick a uniformly random legal move by reservoir sampling (no move list is built)."""
+    pick = None
+    for count, move in enumerate(board.generate_legal_moves(), 1):
+        if random.random() * count < 1:
+            pick = move
+    return pick
+
+
+def zobrist_state_key(board: chess.Board) -> int:
+    """Zobrist hash of everything but the pieces: castling rights, en passant file and turn."""
+    key = ZOBRIST_CASTLING[board.castling_rights & chess.BB_CORNERS]
+    ep_square = board.ep_square
+    # Like Polyglot, the en passant file only counts if a pawn is there to capture
+    if ep_square is not None and (chess.BB_PAWN_ATTACKS[not board.turn][ep_square] &
+                                  board.pawns & board.occupied_co[board.turn]):
+        key ^= ZOBRIST_EP[ep_square & 7]
+    if board.turn == chess.WHITE:
+        key ^= ZOBRIST_TURN
+    return key
+
+
+def zobrist_keys(board: chess.Board) -> Tuple[int, int]:
+    """Compute the (full, pawn-only) Zobrist keys of a board from scratch."""
+    key = zobrist_state_key(board)
+    pawn_key = 0
+    for color in chess.COLORS:
+        zobrist = ZOBRIST_PIECE[color]
+        for square in chess.scan_forward(board.occupied_co[color]):
+            piece_key = zobrist[board.piece_type_at(square)][square]
+            key ^= piece_key
+            if board.pawns & chess.BB_SQUARES[square]:
+                pawn_key ^= piece_key
+    return key, pawn_key
+
+
+def evaluate_pst(bitboards, occupied_white: int, occupied_black: int, white_pst, black_pst) -> int:
+    """
+    Piece-square score (white perspective) from plain integer bitboards.
+    bitboards is indexed by piece type, e.g. (0, board.pawns, ..., board.kings).
+    Kings are left out; the caller blends their PST by game phase.
+    """
+    score = 0
+    
+    for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+        white_bb = bitboards[piece_type] & occupied_white
+        black_bb = bitboards[piece_type] & occupied_black
+        
+        table = white_pst[piece_type]
+        while white_bb:
+            score += table[(white_bb & -white_bb).bit_length() - 1]
+            white_bb &= white_bb - 1
+        table = black_pst[piece_type]
+        while black_bb:
+            score -= table[(black_bb & -black_bb).bit_length() - 1]
+            black_bb &= black_bb - 1
+    
+    return score
 
 class StrongChessEngine:
     """Optimized chess engine with proper search algorithm and time management"""
@@ -22,25 +146,11 @@ class StrongChessEngine:
         """
         self.difficulty = difficulty
         
-        # Piece values (centipawns)
-        self.piece_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 20000
-        }
-        
-        # SEE piece values (for exchange evaluation)
-        self.see_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 20000
-        }
+        # Piece values (centipawns), indexed by piece type: (none, P, N, B, R, Q, K)
+        self.piece_values = (0, 100, 320, 330, 500, 900, 20000)
+        
+        # SEE piece values (for exchange evaluation), indexed the same way
+        self.see_values = (0, 100, 320, 330, 500, 900, 20000)
         
         # Piece-square tables
         self.pawn_table = [
@@ -120,6 +230,38 @@ class StrongChessEngine:
             -50, -30, -30, -30, -30, -30, -30, -50
         ]
         
+        # Flat piece-square tables indexed [color][piece_type][square], with the
+        # black tables mirrored up front (square ^ 56 flips the rank) so lookups
+        # need no per-square arithmetic
+        self.pst = [[None] * 7 for _ in range(2)]
+        self.king_end_pst = [None, None]
+        for piece_type, table in ((chess.PAWN, self.pawn_table), (chess.KNIGHT, self.knight_table),
+                                  (chess.BISHOP, self.bishop_table), (chess.ROOK, self.rook_table),
+                                  (chess.QUEEN, self.queen_table), (chess.KING, self.king_middle_table)):
+            self.pst[chess.WHITE][piece_type] = tuple(table)
+            self.pst[chess.BLACK][piece_type] = tuple(table[s ^ 56] for s in range(64))
+        self.king_end_pst[chess.WHITE] = tuple(self.king_end_table)
+        self.king_end_pst[chess.BLACK] = tuple(self.king_end_table[s ^ 56] for s in range(64))
+        
+        # Passed pawn masks indexed [color][square]: the pawn's own and adjacent files on
+        # every rank ahead of it, so a pawn is passed iff no enemy pawn is in its mask
+        self.passed_mask = [[0] * 64 for _ in range(2)]
+        for square in chess.SQUARES:
+            file = chess.square_file(square)
+            rank = chess.square_rank(square)
+            files = chess.BB_FILES[file]
+            if file > 0:
+                files |= chess.BB_FILES[file - 1]
+            if file < 7:
+                files |= chess.BB_FILES[file + 1]
+            ahead_white = ahead_black = 0
+            for r in range(rank + 1, 8):
+                ahead_white |= chess.BB_RANKS[r]
+            for r in range(rank):
+                ahead_black |= chess.BB_RANKS[r]
+            self.passed_mask[chess.WHITE][square] = files & ahead_white
+            self.passed_mask[chess.BLACK][square] = files & ahead_black
+        
         # Initialize parameters
         self.update_depth()
         
@@ -128,29 +270,70 @@ class StrongChessEngine:
         self.start_time = None
         self.timeout = False
         self.best_move_found = None
+        # The clock is read once every (mask + 1) timeout checks
+        self.timeout_check_mask = 1023
+        self.timeout_checks = 0
         
         # Move ordering heuristics
-        self.killer_moves = [[None, None] for _ in range(64)]
-        self.history_table = [[0 for _ in range(64)] for _ in range(64)]
-        
-        # Transposition table (persistent across moves)
-        self.tt: Dict[int, dict] = {}
-        self.tt_max_size = 1000000  # avoid memory blow
-        
-        # Pawn hash table (caches pawn structure evaluation)
-        self.pawn_tt: Dict[int, float] = {}
+        self.killer_moves = [[0, 0] for _ in range(MAX_PLY)]  # encode_move() codes, 0 = empty
+        # Counter moves: the quiet reply (encode_move() code) that last refuted a move,
+        # indexed by that move's piece type << 6 | to_square
+        self.counter_moves = [0] * (7 << 6)
+        # History scores in one flat list indexed from_square << 6 | to_square, kept within
+        # +-history_max (by the gravity update in alpha_beta_search) so that history // 10
+        # stays below the killer move bonuses in order_moves()
+        self.history_table = [0] * 4096
+        self.history_max = 60000
+        
+        # Transposition table (persistent across moves): a fixed number of slots
+        # indexed by the low bits of the Zobrist key, each holding None or
+        # (key, depth, value, flag, move, age); age is the search that stored it
+        self.tt_size = 1 << 18  # ~2 MB of slots, bounded memory however long the game
+        self.tt_mask = self.tt_size - 1
+        self.tt: List[Optional[tuple]] = [None] * self.tt_size
+        self.tt_age = 0
+        
+        # Static evaluation cache keyed by Zobrist key. The score depends only on the
+        # position, so it is kept across searches and just emptied when it fills up.
+        self.eval_cache: Dict[int, int] = {}
+        self.eval_cache_size = 200000
+        
+        # Pawn hash table (caches pawn structure evaluation, keyed by pawn Zobrist key),
+        # emptied when it fills up like the eval cache
+        self.pawn_tt: Dict[int, int] = {}
+        self.pawn_tt_size = 50000
+        
+        # Results of finished searches keyed by (EPD, difficulty); oldest evicted first
+        self.move_cache: "OrderedDict[Tuple[str, int], Tuple[str, str, Optional[str]]]" = OrderedDict()
+        self.move_cache_size = 512
+        
+        # Opening book reader, opened on first use (stays None without a book file)
+        self.book: Optional[chess.polyglot.MemoryMappedReader] = None
+        self.book_max_fullmove = 10  # only consult the book this early in the game
+        
+        # Zobrist keys and non-king material of the search board, updated incrementally
+        # by push_move()/pop_move(); undo_stack holds the values to restore on pop
+        self.zobrist_key = 0
+        self.pawn_key = 0
+        self.material_white = 0
+        self.material_black = 0
+        self.undo_stack: List[Tuple[int, int, int, int]] = []
+        
+        # Zobrist keys of the positions on the current search line (for repetition)
+        self.position_history: List[int] = []
         
         # Principal variation move from previous iteration (for move ordering)
         self.pv_move = None
         
-        # For null-move pruning: reduction factor (R=2) and material threshold to avoid zugzwang
+        # For null-move pruning: reduction factor (R=2, R=3 from depth 6) and material
+        # threshold to avoid zugzwang
         self.null_move_reduction = 2
         self.null_move_material_threshold = 1500  # skip if total material below this
         self.endgame_material_threshold = 2000    # below this, consider endgame
         
         # Aspiration window size (centipawns)
         self.aspiration_window = 50
-        self.aspiration_max_widening = 5  # number of widening attempts
+        self.aspiration_max_widening = 2  # windowed attempts before a full-window search
         
         # Futility pruning margin base (scaled by depth)
         self.futility_margin_base = 300
@@ -158,6 +341,14 @@ class StrongChessEngine:
         # Reverse futility pruning margin
         self.reverse_futility_margin_base = 300
         
+        # Root splitting across processes, only when this server process has more than one
+        # core to itself: the cores are shared among the gunicorn workers (WEB_CONCURRENCY)
+        server_workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+        self.search_workers = max(1, (os.cpu_count() or 1) // server_workers)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.root_moves: Optional[List[chess.Move]] = None  # restricts the root move list
+        self.root_alpha = -INF  # root scores at or below this are not interesting
+        
         print(f"🎯 Chess Engine initialized with difficulty {self.difficulty}")
         print(f"   Target: Depth {self.target_depth}, Time limit: {self.max_time}s")
     
@@ -173,261 +364,292 @@ class StrongChessEngine:
         self.max_nodes = 1000000  # Default high value
     
     def check_timeout(self) -> bool:
-        """Check if search should timeout"""
-        if self.start_time and (time.time() - self.start_time) > self.max_time:
+        """Check if search should timeout (throttled: only every few hundred calls read the clock)"""
+        if self.timeout:
+            return True
+        self.timeout_checks += 1
+        if self.timeout_checks & self.timeout_check_mask:
+            return False
+        if self.start_time and (time.monotonic() - self.start_time) > self.max_time:
             self.timeout = True
             return True
         return False
     
     # --------------------------------------------------------------------------
-    # Evaluation with optimizations and pawn hash
+    # Incremental Zobrist hashing and material
     # --------------------------------------------------------------------------
-    def is_passed_pawn(self, board: chess.Board, square: chess.Square, color: chess.Color) -> bool:
-        """Return True if the pawn on square is a passed pawn."""
-        file = chess.square_file(square)
-        rank = chess.square_rank(square)
-        
-        if color == chess.WHITE:
-            for f in [file-1, file, file+1]:
-                if f < 0 or f > 7:
-                    continue
-                for r in range(rank+1, 8):
-                    s = chess.square(f, r)
-                    p = board.piece_at(s)
-                    if p and p.piece_type == chess.PAWN and p.color == chess.BLACK:
-                        return False
-        else:
-            for f in [file-1, file, file+1]:
-                if f < 0 or f > 7:
-                    continue
-                for r in range(rank-1, -1, -1):
-                    s = chess.square(f, r)
-                    p = board.piece_at(s)
-                    if p and p.piece_type == chess.PAWN and p.color == chess.WHITE:
-                        return False
-        return True
+    def set_root(self, board: chess.Board):
+        """Hash and count the search root from scratch; push_move()/pop_move() keep it in sync."""
+        self.zobrist_key, self.pawn_key = zobrist_keys(board)
+        for color in chess.COLORS:
+            occupied = board.occupied_co[color]
+            material = sum(chess.popcount(bitboard & occupied) * self.piece_values[piece_type]
+                           for piece_type, bitboard in ((chess.PAWN, board.pawns), (chess.KNIGHT, board.knights),
+                                                        (chess.BISHOP, board.bishops), (chess.ROOK, board.rooks),
+                                                        (chess.QUEEN, board.queens)))
+            if color == chess.WHITE:
+                self.material_white = material
+            else:
+                self.material_black = material
+        self.undo_stack = []
     
-    def evaluate_pawn_structure(self, board: chess.Board) -> float:
+    def push_move(self, board: chess.Board, move: chess.Move):
+        """board.push() that XORs the move into the Zobrist keys and updates the material."""
+        key = self.zobrist_key
+        pawn_key = self.pawn_key
+        self.undo_stack.append((key, pawn_key, self.material_white, self.material_black))
+        key ^= zobrist_state_key(board)
+        
+        if move:  # the null move only changes the state key
+            us = board.turn
+            from_sq = move.from_square
+            to_sq = move.to_square
+            piece_type = board.piece_type_at(from_sq)
+            zobrist_us = ZOBRIST_PIECE[us]
+            
+            # Lift the moving piece
+            key ^= zobrist_us[piece_type][from_sq]
+            if piece_type == chess.PAWN:
+                pawn_key ^= zobrist_us[chess.PAWN][from_sq]
+            
+            if piece_type == chess.KING and board.is_castling(move):
+                # King lands on the g/c file, the rook hops over it
+                rank = from_sq & ~7
+                kingside = board.is_kingside_castling(move)
+                if board.rooks & board.occupied_co[us] & chess.BB_SQUARES[to_sq]:
+                    rook_from = to_sq  # king-takes-rook encoding
+                else:
+                    rook_from = rank + (7 if kingside else 0)
+                to_sq = rank + (6 if kingside else 2)
+                key ^= zobrist_us[chess.ROOK][rook_from] ^ zobrist_us[chess.ROOK][rank + (5 if kingside else 3)]
+            else:
+                # Remove a captured piece (the en passant victim sits behind to_sq)
+                if board.occupied_co[not us] & chess.BB_SQUARES[to_sq]:
+                    victim_sq = to_sq
+                elif piece_type == chess.PAWN and to_sq == board.ep_square and (from_sq ^ to_sq) & 7:
+                    victim_sq = to_sq ^ 8
+                else:
+                    victim_sq = None
+                if victim_sq is not None:
+                    victim_type = board.piece_type_at(victim_sq)
+                    victim_key = ZOBRIST_PIECE[not us][victim_type][victim_sq]
+                    key ^= victim_key
+                    if victim_type == chess.PAWN:
+                        pawn_key ^= victim_key
+                    if us == chess.WHITE:
+                        self.material_black -= self.piece_values[victim_type]
+                    else:
+                        self.material_white -= self.piece_values[victim_type]
+                if move.promotion:
+                    gain = self.piece_values[move.promotion] - self.piece_values[chess.PAWN]
+                    if us == chess.WHITE:
+                        self.material_white += gain
+                    else:
+                        self.material_black += gain
+                    piece_type = move.promotion
+            
+            # Drop the (possibly promoted) piece on its destination
+            key ^= zobrist_us[piece_type][to_sq]
+            if piece_type == chess.PAWN:
+                pawn_key ^= zobrist_us[chess.PAWN][to_sq]
+        
+        board.push(move)
+        self.zobrist_key = key ^ zobrist_state_key(board)
+        self.pawn_key = pawn_key
+    
+    def pop_move(self, board: chess.Board):
+        """board.pop() that restores the Zobrist keys and material saved by push_move()."""
+        board.pop()
+        self.zobrist_key, self.pawn_key, self.material_white, self.material_black = self.undo_stack.pop()
+    
+    # --------------------------------------------------------------------------
+    # Evaluation with optimizations and pawn hash
+    # --------------------------------------------------------------------------
+    def evaluate_pawn_structure(self, board: chess.Board) -> int:
         """
         Evaluate pawn structure (passed, doubled, isolated) and return score from white perspective.
         Uses pawn hash table for caching.
         """
-        # Compute pawn hash key (simple xor of pawn squares and colors)
-        pawn_key = 0
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.PAWN:
-                # Mix square and color into key
-                pawn_key ^= (square + 1) * (1 if piece.color == chess.WHITE else 2)
-        
+        # Pawn-only Zobrist key, maintained incrementally by push_move()
+        pawn_key = self.pawn_key
         if pawn_key in self.pawn_tt:
             return self.pawn_tt[pawn_key]
         
-        # Collect pawn squares
-        white_pawns = []
-        black_pawns = []
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.piece_type == chess.PAWN:
-                if piece.color == chess.WHITE:
-                    white_pawns.append(square)
-                else:
-                    black_pawns.append(square)
+        # Pawns straight from the bitboards
+        white_bb = board.pawns & board.occupied_co[chess.WHITE]
+        black_bb = board.pawns & board.occupied_co[chess.BLACK]
         
         score = 0
         
-        # Passed pawns
-        for sq in white_pawns:
-            if self.is_passed_pawn(board, sq, chess.WHITE):
+        # Passed pawns: one AND against the enemy pawns per pawn
+        white_mask = self.passed_mask[chess.WHITE]
+        black_mask = self.passed_mask[chess.BLACK]
+        for sq in chess.scan_forward(white_bb):
+            if not white_mask[sq] & black_bb:
                 score += 50
-        for sq in black_pawns:
-            if self.is_passed_pawn(board, sq, chess.BLACK):
+        for sq in chess.scan_forward(black_bb):
+            if not black_mask[sq] & white_bb:
                 score -= 50
         
-        # Doubled & isolated pawns – count per file
-        def pawn_counts(pawns):
-            files = [0]*8
-            for sq in pawns:
-                files[chess.square_file(sq)] += 1
-            return files
-        
-        white_files = pawn_counts(white_pawns)
-        black_files = pawn_counts(black_pawns)
-        
-        # Doubled penalty
-        doubled_w = sum(max(0, cnt-1) for cnt in white_files)
-        doubled_b = sum(max(0, cnt-1) for cnt in black_files)
+        # Doubled & isolated pawns – fold each side's pawns onto one rank to get an
+        # 8-bit mask of the files that hold pawns (bit f set = pawn on file f)
+        white_files = white_bb | white_bb >> 32
+        white_files |= white_files >> 16
+        white_files = (white_files | white_files >> 8) & 0xFF
+        black_files = black_bb | black_bb >> 32
+        black_files |= black_files >> 16
+        black_files = (black_files | black_files >> 8) & 0xFF
+        
+        # Doubled penalty: every pawn beyond the first on its file
+        doubled_w = chess.popcount(white_bb) - chess.popcount(white_files)
+        doubled_b = chess.popcount(black_bb) - chess.popcount(black_files)
         score -= doubled_w * 20
         score += doubled_b * 20
         
-        # Isolated penalty
-        isolated_w = 0
-        for f in range(8):
-            if white_files[f] > 0:
-                left = f>0 and white_files[f-1]>0
-                right = f<7 and white_files[f+1]>0
-                if not left and not right:
-                    isolated_w += 1
-        isolated_b = 0
-        for f in range(8):
-            if black_files[f] > 0:
-                left = f>0 and black_files[f-1]>0
-                right = f<7 and black_files[f+1]>0
-                if not left and not right:
-                    isolated_b += 1
+        # Isolated penalty: pawn files with no pawn file on either side
+        isolated_w = chess.popcount(white_files & ~(white_files << 1 | white_files >> 1))
+        isolated_b = chess.popcount(black_files & ~(black_files << 1 | black_files >> 1))
         score -= isolated_w * 15
         score += isolated_b * 15
         
+        if len(self.pawn_tt) >= self.pawn_tt_size:
+            self.pawn_tt.clear()
         self.pawn_tt[pawn_key] = score
         return score
     
-    def evaluate_position(self, board: chess.Board) -> float:
+    def evaluate_position(self, board: chess.Board) -> int:
         """
         Fast evaluation of the board position.
         Returns score from the perspective of the side to move.
+        The board must be the search board, whose Zobrist keys are kept by push_move().
         """
+        # Positions repeat a lot inside quiescence: reuse their static score
+        key = self.zobrist_key
+        cached = self.eval_cache.get(key)
+        if cached is not None:
+            return cached
+        
         # Quick terminal condition checks
         if board.is_checkmate():
-            return -100000  # will be adjusted with ply later
+            return -MATE_SCORE  # will be adjusted with ply later
         if board.is_stalemate() or board.is_insufficient_material():
             return 0
         
-        # Material and positional evaluation
-        score = 0
-        white_material = 0
-        black_material = 0
-        
-        # Use piece_map() to iterate only over occupied squares
-        piece_map = board.piece_map()
-        
-        # Track bishops for bonus
-        white_bishops = 0
-        black_bishops = 0
-        
-        for square, piece in piece_map.items():
-            material = self.piece_values[piece.piece_type]
-            
-            # Position value with table
-            table = None
-            if piece.piece_type == chess.PAWN:
-                table = self.pawn_table
-            elif piece.piece_type == chess.KNIGHT:
-                table = self.knight_table
-            elif piece.piece_type == chess.BISHOP:
-                table = self.bishop_table
-            elif piece.piece_type == chess.ROOK:
-                table = self.rook_table
-            elif piece.piece_type == chess.QUEEN:
-                table = self.queen_table
-            elif piece.piece_type == chess.KING:
-                # We'll handle king separately with blending
-                pass
-            
-            pos_value = 0
-            if table is not None:
-                idx = square if piece.color == chess.WHITE else (7 - square//8)*8 + (square%8)
-                pos_value = table[idx]
-            
-            if piece.color == chess.WHITE:
-                score += material + pos_value
-                white_material += material
-                if piece.piece_type == chess.BISHOP:
-                    white_bishops += 1
-            else:
-                score -= material + pos_value
-                black_material += material
-                if piece.piece_type == chess.BISHOP:
-                    black_bishops += 1
+        # Non-king material is kept up to date by push_move(); piece-square values come
+        # straight from the piece bitboards
+        white_material = self.material_white
+        black_material = self.material_black
+        occupied_white = board.occupied_co[chess.WHITE]
+        occupied_black = board.occupied_co[chess.BLACK]
+        score = white_material - black_material + evaluate_pst(
+            (0, board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings),
+            occupied_white, occupied_black, self.pst[chess.WHITE], self.pst[chess.BLACK]
+        )
         
         # Bishop pair bonus
-        if white_bishops >= 2:
+        if chess.popcount(board.bishops & occupied_white) >= 2:
             score += 40
-        if black_bishops >= 2:
+        if chess.popcount(board.bishops & occupied_black) >= 2:
             score -= 40
         
         # Pawn structure evaluation (cached)
         score += self.evaluate_pawn_structure(board)
         
-        # Mobility – evaluate for both sides using null move (safer)
-        current_moves = board.legal_moves.count()
-        board.push(chess.Move.null())
-        opponent_moves = board.legal_moves.count()
-        board.pop()
-        
-        if board.turn == chess.WHITE:
-            score += (current_moves - opponent_moves) * 5
-        else:
-            score -= (current_moves - opponent_moves) * 5
-        
-        # King safety: blend PST using endgame factor
+        # Mobility – squares each side attacks that are not blocked by its own pieces
+        # (attack-table lookups, no move generation and no board.turn flipping)
+        attacks_mask = board.attacks_mask
+        white_attacks = 0
+        for square in chess.scan_forward(occupied_white):
+            white_attacks |= attacks_mask(square)
+        black_attacks = 0
+        for square in chess.scan_forward(occupied_black):
+            black_attacks |= attacks_mask(square)
+        score += (chess.popcount(white_attacks & ~occupied_white) -
+                  chess.popcount(black_attacks & ~occupied_black)) * 5
+        
+        # King safety: blend the middlegame and endgame king PSTs by the non-king material
+        # left on the board (4000 or more: pure middlegame; 2000 or less: pure endgame)
         total_material = white_material + black_material
-        endgame_factor = max(0.0, min(1.0, (4000 - total_material) / 2000))
+        endgame_phase = max(0, min(2000, 4000 - total_material))  # 0 = middlegame, 2000 = endgame
         
         # Add king position value with blending
-        for color, material_sum, sign in [(chess.WHITE, white_material, 1), (chess.BLACK, black_material, -1)]:
+        for color, sign in ((chess.WHITE, 1), (chess.BLACK, -1)):
             king_sq = board.king(color)
             if king_sq is not None:
-                idx = king_sq if color == chess.WHITE else (7 - king_sq//8)*8 + (king_sq%8)
-                mid_val = self.king_middle_table[idx]
-                end_val = self.king_end_table[idx]
-                king_val = (1 - endgame_factor) * mid_val + endgame_factor * end_val
+                mid_val = self.pst[color][chess.KING][king_sq]
+                end_val = self.king_end_pst[color][king_sq]
+                king_val = (mid_val * (2000 - endgame_phase) + end_val * endgame_phase) // 2000
                 score += sign * king_val
         
         # Return score from side to move perspective
-        return score if board.turn == chess.WHITE else -score
+        score = score if board.turn == chess.WHITE else -score
+        if len(self.eval_cache) >= self.eval_cache_size:
+            self.eval_cache.clear()
+        self.eval_cache[key] = score
+        return score
     
     # --------------------------------------------------------------------------
     # Static Exchange Evaluation (SEE)
     # --------------------------------------------------------------------------
     def see(self, board: chess.Board, move: chess.Move) -> int:
         """
-        Static Exchange Evaluation: estimate the material gain/loss of a capture.
-        Returns the net material balance after the exchange (positive if good for moving side).
+        Static Exchange Evaluation (swap-off): play out the capture sequence on the target
+        square, each side recapturing with its least valuable attacker and free to stop.
+        Returns the net material balance (positive if good for the moving side).
         """
-        if not board.is_capture(move):
-            return 0
-        
-        # We'll simulate captures on the target square
-        target = move.to_square
         from_sq = move.from_square
-        piece = board.piece_at(from_sq)
-        if not piece:
+        to_sq = move.to_square
+        attacker_type = board.piece_type_at(from_sq)
+        occupied = board.occupied ^ chess.BB_SQUARES[from_sq]
+        if board.occupied_co[not board.turn] & chess.BB_SQUARES[to_sq]:
+            victim_type = board.piece_type_at(to_sq)
+        elif attacker_type == chess.PAWN and to_sq == board.ep_square and (from_sq ^ to_sq) & 7:
+            victim_type = chess.PAWN
+            occupied ^= chess.BB_SQUARES[to_sq ^ 8]
+        else:
             return 0
         
-        # Get initial attacker value
-        attacker_value = self.see_values[piece.piece_type]
-        victim = board.piece_at(target)
-        if not victim:
-            return 0
-        victim_value = self.see_values[victim.piece_type]
-        
-        # We'll perform a simple exchange using a list of attackers and defenders
-        # For simplicity, we'll use a recursive SEE; but for speed, a simplified version:
-        # Just return victim_value - attacker_value (very basic)
-        # But we'll implement a proper SEE for better move ordering.
-        # This is a simplified SEE; a full implementation would be longer.
-        # We'll use the delta = victim_value - attacker_value and then consider next attackers.
-        # For now, we'll use a quick heuristic: if victim value > attacker value, it's good.
-        return victim_value - attacker_value
+        see_values = self.see_values
+        piece_bitboards = (board.pawns, board.knights, board.bishops,
+                           board.rooks, board.queens, board.kings)
+        gains = [see_values[victim_type]]
+        on_square = see_values[move.promotion or attacker_type]
+        side = not board.turn
+        while True:
+            # Sliding attackers are recomputed against the thinned-out occupancy (x-rays)
+            attackers = board.attackers_mask(side, to_sq, occupied) & occupied
+            if not attackers:
+                break
+            for piece_type, bitboard in enumerate(piece_bitboards, 1):
+                if attackers & bitboard:
+                    break
+            least = attackers & bitboard
+            occupied ^= least & -least
+            gains.append(on_square - gains[-1])
+            on_square = see_values[piece_type]
+            side = not side
+        
+        # Negamax the gains back: each side only recaptures if it pays off
+        for d in range(len(gains) - 1, 0, -1):
+            gains[d - 1] = -max(-gains[d - 1], gains[d])
+        return gains[0]
     
     # --------------------------------------------------------------------------
     # Search with iterative deepening, transposition table, LMR, check extension, null move, aspiration windows
     # --------------------------------------------------------------------------
-    def iterative_deepening_search(self, board: chess.Board, max_depth: int) -> Tuple[Optional[chess.Move], float]:
+    def iterative_deepening_search(self, board: chess.Board, max_depth: int) -> Tuple[Optional[chess.Move], int]:
         """Perform iterative deepening search with time management and aspiration windows"""
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.timeout = False
         self.nodes_searched = 0
-        # Keep transposition table (do NOT clear)
-        if len(self.tt) > self.tt_max_size:
-            # Remove half of entries (crude but effective)
-            keys = list(self.tt.keys())
-            for k in keys[:len(keys)//2]:
-                del self.tt[k]
-        # Also clear pawn TT occasionally (optional)
+        self.position_history = []
+        self.set_root(board)
+        # Keep transposition table (do NOT clear); entries from older searches are
+        # the first to be replaced
+        self.tt_age += 1
         
         best_move = None
-        best_value = -math.inf
+        best_value = -INF
         prev_eval = None  # for aspiration windows
         
         # Try depths from 2 to max_depth
@@ -437,11 +659,14 @@ class StrongChessEngine:
                 
             print(f"  Searching depth {depth}...")
             
+            # Age history scores so older iterations (and searches) weigh less
+            self.history_table = [score >> 1 for score in self.history_table]
+            
             # Store PV move for move ordering at next depth
             self.pv_move = best_move
             
             # Aspiration windows: narrow window around previous score if we have one
-            if prev_eval is not None and depth >= 4:
+            if prev_eval is not None and depth >= 4 and self.root_alpha == -INF:
                 alpha = prev_eval - self.aspiration_window
                 beta  = prev_eval + self.aspiration_window
                 # Search with narrow window
@@ -453,113 +678,279 @@ class StrongChessEngine:
                         # If inside window, done
                         if alpha < current_best_value < beta:
                             break
-                        # Otherwise widen window and retry
-                        alpha -= self.aspiration_window
-                        beta  += self.aspiration_window
+                        # Otherwise open only the side that failed and retry; the
+                        # other bound still prunes
+                        if current_best_value <= alpha:
+                            alpha = -INF
+                        else:
+                            beta = INF
                     except Exception as e:
                         # Fallback to full window search
                         print(f"    Aspiration search error: {e}, using full window")
                         current_best_move, current_best_value = self.alpha_beta_search(
-                            board, depth, -math.inf, math.inf, 0, extended=False
+                            board, depth, -INF, INF, 0, extended=False
                         )
                         break
                 else:
                     # If still outside after widening, do full window
                     current_best_move, current_best_value = self.alpha_beta_search(
-                        board, depth, -math.inf, math.inf, 0, extended=False
+                        board, depth, -INF, INF, 0, extended=False
                     )
             else:
-                # First depth or shallow depth: full window
+                # First depth or shallow depth: full window (raised to root_alpha when
+                # only moves that beat a known score matter)
                 current_best_move, current_best_value = self.alpha_beta_search(
-                    board, depth, -math.inf, math.inf, 0, extended=False
+                    board, depth, self.root_alpha, INF, 0, extended=False
                 )
             
             if not self.timeout and current_best_move:
                 best_move = current_best_move
                 best_value = current_best_value
                 prev_eval = best_value
-                print(f"    Depth {depth}: eval = {best_value:.1f}, nodes = {self.nodes_searched}")
+                print(f"    Depth {depth}: eval = {best_value / 100:+.2f}, nodes = {self.nodes_searched}")
                 
                 # If we found a forced mate, no need to search deeper
-                if abs(best_value) > 90000:
+                if abs(best_value) > MATE_THRESHOLD:
                     print(f"    Found forced mate, stopping search")
                     break
         
         print(f"  Search complete: {self.nodes_searched} nodes")
         return best_move, best_value
     
-    def alpha_beta_search(self, board: chess.Board, depth: int, alpha: float, beta: float,
-                         ply: int = 0, extended: bool = False) -> Tuple[Optional[chess.Move], float]:
+    def parallel_root_search(self, board: chess.Board, max_depth: int) -> Tuple[Optional[chess.Move], int]:
+        """
+        Root splitting: search the first ordered root move here to get a score to beat,
+        then deal the remaining moves round-robin to worker processes, each running its
+        own iterative deepening search above that score, and keep the best result.
+        """
+        if self.executor is None:
+            # Never fork: the gthread server process already runs threads whose locks a
+            # forked child could inherit held. forkserver where available, else spawn.
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.executor = ProcessPoolExecutor(max_workers=self.search_workers,
+                                                mp_context=multiprocessing.get_context(start_method))
+        
+        # Order the root by this position's hash move, not the previous search's PV move
+        key = zobrist_keys(board)[0]
+        entry = self.tt[key & self.tt_mask]
+        tt_move = entry[4] if entry is not None and entry[0] == key else None
+        self.pv_move = None
+        ordered = self.order_moves(board, tt_move=tt_move)
+        first, rest = ordered[0], ordered[1:]
+        
+        # The likely best move first, serially: its score lets the workers search the
+        # other moves with a raised alpha instead of a full window
+        self.root_moves = [first]
+        try:
+            best_move, best_value = self.iterative_deepening_search(board, max_depth)
+        finally:
+            self.root_moves = None
+        # A forced mate for us can't be beaten; being mated after it means the other
+        # moves matter all the more, so only the former skips the split
+        if self.timeout or not rest or best_value > MATE_THRESHOLD:
+            return best_move, best_value
+        
+        time_left = self.max_time - (time.monotonic() - self.start_time)
+        n = min(self.search_workers, len(rest))
+        fen = board.fen()
+        shares = [rest[i::n] for i in range(n)]
+        print(f"  Searching {len(rest)} more root moves on {n} workers...")
+        
+        # A dead worker process breaks the whole pool: its unfinished shares are
+        # searched here instead, and the pool is rebuilt by the next search
+        unsearched: List[chess.Move] = []
+        futures = []
+        for share in shares:
+            try:
+                futures.append((share, self.executor.submit(
+                    search_root_moves, fen, [m.uci() for m in share],
+                    max_depth, self.difficulty, time_left, best_value)))
+            except BrokenProcessPool:
+                unsearched.extend(share)
+        
+        for share, future in futures:
+            try:
+                move_uci, value, nodes, timed_out = future.result(timeout=time_left + 5)
+            except BrokenProcessPool:
+                unsearched.extend(share)
+                continue
+            except Exception as e:
+                print(f"    Worker search error: {e}")
+                self.timeout = True
+                continue
+            self.nodes_searched += nodes
+            if timed_out:
+                # Its result comes from a shallower depth than best_value: not comparable
+                self.timeout = True
+                continue
+            if move_uci and value > best_value:
+                best_move = chess.Move.from_uci(move_uci)
+                best_value = value
+        
+        if unsearched:
+            print(f"    Worker pool broke, searching {len(unsearched)} root moves here")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            move, value = self.serial_root_search(board, max_depth, unsearched, best_value)
+            if move and value > best_value:
+                best_move = move
+                best_value = value
+        
+        print(f"  Search complete: {self.nodes_searched} nodes")
+        return best_move, best_value
+    
+    def serial_root_search(self, board: chess.Board, max_depth: int, root_moves: List[chess.Move],
+                           root_alpha: int) -> Tuple[Optional[chess.Move], int]:
+        """
+        Search only root_moves, above root_alpha, in this process within what is left of
+        the current search's time, as a worker of parallel_root_search would.
+        """
+        start_time = self.start_time
+        max_time = self.max_time
+        nodes = self.nodes_searched
+        timed_out = self.timeout
+        self.max_time = max(0.0, max_time - (time.monotonic() - start_time))
+        self.root_moves = root_moves
+        self.root_alpha = root_alpha
+        try:
+            move, value = self.iterative_deepening_search(board, max_depth)
+        finally:
+            self.root_moves = None
+            self.root_alpha = -INF
+            self.max_time = max_time
+            self.start_time = start_time
+            self.nodes_searched += nodes
+        # A result from a shallower, interrupted depth is not comparable either
+        if self.timeout:
+            return None, -INF
+        self.timeout = timed_out
+        return move, value
+    
+    def alpha_beta_search(self, board: chess.Board, depth: int, alpha: int, beta: int,
+                         ply: int = 0, extended: bool = False) -> Tuple[Optional[chess.Move], int]:
         """
         Negamax alpha-beta search with TT, LMR, check extension, null move, futility pruning, reverse futility.
         extended: whether we already applied a check extension in this branch (to avoid over-extension)
         """
-        # Check timeout every 1000 nodes
-        if self.nodes_searched % 1000 == 0 and self.check_timeout():
+        # Check timeout (throttled inside check_timeout)
+        if self.check_timeout():
             return None, 0
         
         self.nodes_searched += 1
+        in_check = board.is_check()
         
         # Check extension (limit to once per branch and only when depth <= 2 to avoid explosion)
-        if not extended and board.is_check() and depth <= 2 and depth < self.max_depth * 2:
+        if not extended and in_check and depth <= 2 and depth < self.max_depth * 2:
             depth += 1
             extended = True
         
-        # Transposition table lookup (public method if available)
-        try:
-            key = board.transposition_key()
-        except AttributeError:
-            key = board._transposition_key()  # fallback to private
-        tt_entry = self.tt.get(key)
-        if tt_entry and tt_entry['depth'] >= depth:
-            if tt_entry['flag'] == 'exact':
-                return tt_entry['move'], tt_entry['value']
-            elif tt_entry['flag'] == 'lower':
-                alpha = max(alpha, tt_entry['value'])
-            elif tt_entry['flag'] == 'upper':
-                beta = min(beta, tt_entry['value'])
+        # Mate-distance pruning: being mated here scores -MATE_SCORE + ply at worst and
+        # mating next move MATE_SCORE - ply - 1 at best, so a window outside that range
+        # (a shorter mate is already known) cannot be improved on below this node
+        if ply > 0:
+            alpha = max(alpha, -MATE_SCORE + ply)
+            beta = min(beta, MATE_SCORE - ply - 1)
             if alpha >= beta:
-                return tt_entry['move'], tt_entry['value']
+                return None, alpha
+        
+        # The caller's window, for the TT bound flag (the probe below may narrow it)
+        alpha_orig = alpha
+        beta_orig = beta
+        
+        # Transposition table lookup (Zobrist key kept up to date by push_move)
+        key = self.zobrist_key
+        tt_entry = self.tt[key & self.tt_mask]
+        tt_move = None
+        if tt_entry is not None and tt_entry[0] == key:
+            _, tt_depth, tt_value, tt_flag, tt_move, _ = tt_entry
+            # Mate scores are stored relative to the stored node; re-anchor them to this ply
+            if tt_value > MATE_THRESHOLD:
+                tt_value -= ply
+            elif tt_value < -MATE_THRESHOLD:
+                tt_value += ply
+            # Never cut at the root: it must search its (possibly restricted) move list
+            # and hand back a move, the stored entry only orders it
+            if tt_depth >= depth and ply > 0:
+                if tt_flag == TT_EXACT:
+                    return tt_move, tt_value
+                elif tt_flag == TT_LOWER:
+                    alpha = max(alpha, tt_value)
+                elif tt_flag == TT_UPPER:
+                    beta = min(beta, tt_value)
+                if alpha >= beta:
+                    return tt_move, tt_value
         
         # Terminal conditions
         if board.is_checkmate():
-            return None, -100000 + ply
-        if board.is_stalemate() or board.is_insufficient_material() or board.can_claim_threefold_repetition():
+            return None, -MATE_SCORE + ply
+        if board.is_stalemate() or board.is_insufficient_material():
+            return None, 0
+        # Repetition along the current search line: the first repeat already scores as a
+        # draw (the side that could avoid it would have), and only positions since the
+        # last capture or pawn move can recur, so scan just that many plies back
+        halfmove_clock = board.halfmove_clock
+        if halfmove_clock >= 4 and key in self.position_history[-halfmove_clock:]:
             return None, 0
         
-        # Leaf node – quiescence search
-        if depth == 0:
+        # Leaf node – quiescence search (also the floor for absurdly extended lines,
+        # so killer_moves[ply] below is always in range)
+        if depth == 0 or ply >= MAX_PLY:
             return None, self.quiescence(board, alpha, beta, ply)
         
-        # Material for pruning decisions
-        total_material = sum(self.piece_values[p.piece_type] for p in board.piece_map().values())
+        # Non-king material for pruning decisions (kept up to date by push_move)
+        total_material = self.material_white + self.material_black
+        
+        # Static evaluation, computed at most once per node and only if a pruning rule needs it
+        static_eval = None
         
         # Reverse futility pruning (at shallow depth)
-        if depth <= 3 and not board.is_check() and not board.is_checkmate():
+        if depth <= 3 and not in_check:
             static_eval = self.evaluate_position(board)
             margin = self.reverse_futility_margin_base * depth
             if static_eval - margin >= beta:
                 return None, static_eval
         
-        # Null-move pruning (if not in check, depth>=3, enough material, and not endgame)
-        if (depth >= 3 and not board.is_check() and 
+        # Null-move pruning (if not in check, depth>=3, enough material, and not endgame).
+        # The side to move must also keep a piece other than pawns/king and the board
+        # must not be nearly empty, otherwise zugzwang makes passing unsound. Never pass
+        # twice in a row (a null move is falsy): that just searches the same position
+        # again at an even shallower depth.
+        if (depth >= 3 and not in_check and 
+            (not board.move_stack or board.move_stack[-1]) and
             total_material >= self.null_move_material_threshold and
-            total_material > self.endgame_material_threshold):  # skip in endgames
-            board.push(chess.Move.null())
-            _, value = self.alpha_beta_search(board, depth - 1 - self.null_move_reduction, -beta, -beta+1, ply+1, extended)
+            total_material > self.endgame_material_threshold and  # skip in endgames
+            board.occupied_co[board.turn] & ~(board.pawns | board.kings) and
+            chess.popcount(board.occupied) > 5):
+            # Deeper nodes can afford to pass with a bigger reduction
+            reduction = self.null_move_reduction + (depth >= 6)
+            self.push_move(board, chess.Move.null())
+            _, value = self.alpha_beta_search(board, depth - 1 - reduction, -beta, -beta+1, ply+1, extended)
             value = -value
-            board.pop()
+            self.pop_move(board)
             if value >= beta:
-                return None, beta
-        
-        # Generate and order moves
-        moves = self.order_moves(board, ply)
+                # Fail-soft, but never trust a mate score found by passing
+                return None, value if value < MATE_THRESHOLD else beta
+        
+        # Generate and order moves (below the root the hash move is tried before any
+        # generation, so a cutoff on it skips generating and scoring the rest)
+        if ply == 0:
+            moves = self.order_moves(board, ply, tt_move=tt_move)
+            if self.root_moves:
+                moves = [m for m in moves if m in self.root_moves]
+        else:
+            moves = self.staged_moves(board, ply, tt_move)
         best_move = None
-        best_value = -math.inf
-        alpha_orig = alpha
-        beta_orig = beta
+        best_value = -INF
         move_count = 0
         
+        # Bind hot attributes to locals once per node instead of once per move
+        search = self.alpha_beta_search
+        push_move = self.push_move
+        pop_move = self.pop_move
+        killers = self.killer_moves[ply]
+        quiets_searched = []  # history indices of quiet moves that failed to cut off
+        
+        self.position_history.append(key)
         for move in moves:
             move_count += 1
             
@@ -567,47 +958,65 @@ class StrongChessEngine:
             if self.timeout:
                 break
             
+            # Classify the move once for all the pruning rules below
+            is_capture = board.is_capture(move)
+            is_quiet = not is_capture and not move.promotion
+            
             # Futility pruning at depth 1
-            if depth == 1 and not board.is_check() and not board.is_capture(move) and not move.promotion:
-                # Static evaluation of current position
-                static_eval = self.evaluate_position(board)
+            if depth == 1 and not in_check and is_quiet:
+                # Static evaluation of current position (shared by all moves of this node)
+                if static_eval is None:
+                    static_eval = self.evaluate_position(board)
                 margin = self.futility_margin_base * depth
                 # If even with margin we cannot raise alpha, skip (unless gives check)
                 if static_eval + margin < alpha:
-                    board.push(move)
-                    gives_check = board.is_check()
-                    board.pop()
-                    if not gives_check:
+                    if not board.gives_check(move):
+                        # Fail-soft: the skipped move is bounded by static_eval + margin
+                        best_value = max(best_value, static_eval + margin)
                         continue
             
             # Late Move Reduction (LMR) - reduce depth for late quiet moves
             do_lmr = False
             reduction = 0
-            if (move_count > 3 and depth >= 3 and 
-                not board.is_capture(move) and not move.promotion and
-                move not in self.killer_moves[ply]):
+            if (move_count > 3 and depth >= 3 and is_quiet and
+                encode_move(move) not in killers and
+                not in_check and not board.gives_check(move)):
                 # Reduction scales with move count and depth
                 reduction = 1 + min(move_count // 6, depth // 2)
                 reduction = min(reduction, depth - 1)  # cannot reduce below 0
                 do_lmr = True
             
-            board.push(move)
+            push_move(board, move)
             
             if do_lmr:
                 new_depth = depth - 1 - reduction
                 if new_depth < 0:
                     new_depth = 0
-                _, value = self.alpha_beta_search(board, new_depth, -beta, -alpha, ply + 1, extended)
+                # Reduced null-window scout: late quiet moves are expected to fail low
+                _, value = search(board, new_depth, -alpha - 1, -alpha, ply + 1, extended)
                 value = -value
-                # If the reduced search causes a cutoff or is above alpha, re-search at full depth
-                if value > alpha and value < beta and new_depth < depth - 1:
-                    _, value = self.alpha_beta_search(board, depth - 1, -beta, -alpha, ply + 1, extended)
+                # If the reduced scout beats alpha, verify at full depth (still a scout),
+                # then with the full window if it really lands inside it
+                if value > alpha and new_depth < depth - 1:
+                    _, value = search(board, depth - 1, -alpha - 1, -alpha, ply + 1, extended)
+                    value = -value
+                if alpha < value < beta:
+                    _, value = search(board, depth - 1, -beta, -alpha, ply + 1, extended)
                     value = -value
+            elif move_count == 1:
+                # Principal variation search: the first (best-ordered) move gets the full window
+                _, value = search(board, depth - 1, -beta, -alpha, ply + 1, extended)
+                value = -value
             else:
-                _, value = self.alpha_beta_search(board, depth - 1, -beta, -alpha, ply + 1, extended)
+                # ... the rest a null-window scout that only proves they are no better,
+                # re-searched with the full window when one turns out to raise alpha
+                _, value = search(board, depth - 1, -alpha - 1, -alpha, ply + 1, extended)
                 value = -value
+                if alpha < value < beta:
+                    _, value = search(board, depth - 1, -beta, -alpha, ply + 1, extended)
+                    value = -value
             
-            board.pop()
+            pop_move(board)
             
             if value > best_value:
                 best_value = value
@@ -615,99 +1024,140 @@ class StrongChessEngine:
                 alpha = max(alpha, value)
                 if alpha >= beta:
                     # Store killer move and history
-                    if not board.is_capture(move):
-                        if move != self.killer_moves[ply][0]:
-                            self.killer_moves[ply][1] = self.killer_moves[ply][0]
-                            self.killer_moves[ply][0] = move
-                        # Update history table with depth squared
-                        self.history_table[move.from_square][move.to_square] += depth * depth
+                    if not is_capture:
+                        move_code = encode_move(move)
+                        if move_code != killers[0]:
+                            killers[1] = killers[0]
+                            killers[0] = move_code
+                        # Remember it as the counter to the opponent's last move
+                        if board.move_stack:
+                            last_move = board.move_stack[-1]
+                            if last_move:
+                                self.counter_moves[board.piece_type_at(last_move.to_square) << 6 |
+                                                   last_move.to_square] = move_code
+                        # Reward the cutoff move and penalise the quiet moves tried before
+                        # it by depth squared. Gravity (h += bonus - h * |bonus| / max)
+                        # shrinks updates near the bound, keeping |h| <= history_max.
+                        history_table = self.history_table
+                        history_max = self.history_max
+                        bonus = depth * depth
+                        index = move.from_square << 6 | move.to_square
+                        history_table[index] += bonus - history_table[index] * bonus // history_max
+                        for index in quiets_searched:
+                            history_table[index] -= bonus + history_table[index] * bonus // history_max
                     break
+            if is_quiet:
+                quiets_searched.append(move.from_square << 6 | move.to_square)
+        self.position_history.pop()
+        
+        # An interrupted search has unreliable values, and a root restricted to some of
+        # its moves is not a result for the position: keep both out of the TT
+        if self.timeout or (ply == 0 and self.root_moves):
+            return best_move, best_value if best_value != -INF else 0
         
         # Store in transposition table
         if best_value <= alpha_orig:
-            flag = 'upper'
+            flag = TT_UPPER
         elif best_value >= beta_orig:
-            flag = 'lower'
+            flag = TT_LOWER
         else:
-            flag = 'exact'
-        self.tt[key] = {
-            'depth': depth,
-            'value': best_value,
-            'flag': flag,
-            'move': best_move
-        }
-        
-        return best_move, best_value if best_value != -math.inf else 0
+            flag = TT_EXACT
+        self.tt_store(key, depth, best_value, flag, best_move, ply)
+        
+        return best_move, best_value if best_value != -INF else 0
     
-    def quiescence(self, board: chess.Board, alpha: float, beta: float, ply: int = 0) -> float:
-        """Quiescence search – only captures, to avoid horizon effect."""
+    def tt_store(self, key: int, depth: int, value: int, flag: int, move: Optional[chess.Move],
+                 ply: int = 0):
+        """
+        Store a search result in its slot. Depth-preferred replacement: a deeper entry
+        from the current search is kept, anything else is overwritten.
+        Mate scores are stored as distance from this node, not from the root, so they
+        stay correct when the position is reached again at another ply.
+        """
+        index = key & self.tt_mask
+        entry = self.tt[index]
+        if entry is not None and entry[5] == self.tt_age and entry[1] > depth:
+            return
+        if value > MATE_THRESHOLD:
+            value += ply
+        elif value < -MATE_THRESHOLD:
+            value -= ply
+        self.tt[index] = (key, depth, value, flag, move, self.tt_age)
+    
+    def quiescence(self, board: chess.Board, alpha: int, beta: int, ply: int = 0) -> int:
+        """Quiescence search (fail-soft) – only captures and queen promotions, to avoid horizon effect."""
         stand_pat = self.evaluate_position(board)
         
+        # Checkmated here (no moves to try): score by distance from the root like the
+        # main search, so shorter mates rank first and stay inside the mate bounds
+        if stand_pat == -MATE_SCORE:
+            return -MATE_SCORE + ply
+        
         if stand_pat >= beta:
-            return beta
+            return stand_pat
         if stand_pat > alpha:
             alpha = stand_pat
+        best_score = stand_pat
+        
+        # Generate captures (python-chess masks move generation to enemy-occupied squares
+        # plus en passant, so quiet moves are never built), each scored once by SEE
+        see = self.see
+        scored = [(see(board, m), m) for m in board.generate_legal_captures()]
+        
+        # Quiet queen promotions: worth the promotion gain if the square is safe, a lost
+        # pawn if the opponent takes for free, and about even if we can recapture
+        turn = board.turn
+        promoting = board.pawns & board.occupied_co[turn] & (chess.BB_RANK_7 if turn else chess.BB_RANK_2)
+        if promoting:
+            promotion_gain = self.see_values[chess.QUEEN] - self.see_values[chess.PAWN]
+            for move in board.generate_legal_moves(promoting, chess.BB_ALL & ~board.occupied):
+                if move.promotion != chess.QUEEN:
+                    continue
+                if not board.is_attacked_by(not turn, move.to_square):
+                    scored.append((promotion_gain, move))
+                elif board.is_attacked_by(turn, move.to_square):
+                    scored.append((0, move))
+                else:
+                    scored.append((-self.see_values[chess.PAWN], move))
+        scored.sort(key=itemgetter(0), reverse=True)
         
-        # Generate capture moves only
-        capture_moves = [m for m in board.legal_moves if board.is_capture(m)]
-        # Order captures by SEE
-        capture_moves.sort(key=lambda m: self.see(board, m), reverse=True)
-        
-        for move in capture_moves:
+        for exchange, move in scored:
             # Check timeout
             if self.check_timeout():
                 break
             
+            # Captures that lose material in the exchange (sorted last) cannot help
+            if exchange < 0:
+                break
+            
             # Delta pruning – skip captures unlikely to raise alpha
             if self.delta_pruning(board, move, stand_pat, alpha, beta):
                 continue
             
-            board.push(move)
+            self.push_move(board, move)
             score = -self.quiescence(board, -beta, -alpha, ply + 1)
-            board.pop()
+            self.pop_move(board)
             
-            if score >= beta:
-                return beta
-            if score > alpha:
-                alpha = score
-        
-        return alpha
-    
-    def see(self, board: chess.Board, move: chess.Move) -> int:
-        """
-        Static Exchange Evaluation: estimate material gain of a capture.
-        Positive means good for moving side.
-        Simplified implementation for speed.
-        """
-        if not board.is_capture(move):
-            return 0
-        
-        target = move.to_square
-        from_sq = move.from_square
-        piece = board.piece_at(from_sq)
-        if not piece:
-            return 0
-        attacker_val = self.see_values[piece.piece_type]
-        victim = board.piece_at(target)
-        if not victim:
-            return 0
-        victim_val = self.see_values[victim.piece_type]
-        
-        # Very simple: if victim value > attacker value, it's good
-        # In a full SEE we'd simulate sequence; but for move ordering this is often enough.
-        return victim_val - attacker_val
+            if score > best_score:
+                best_score = score
+                if score >= beta:
+                    return score
+                if score > alpha:
+                    alpha = score
+        
+        return best_score
     
-    def delta_pruning(self, board: chess.Board, move: chess.Move, stand_pat: float,
-                     alpha: float, beta: float) -> bool:
+    def delta_pruning(self, board: chess.Board, move: chess.Move, stand_pat: int,
+                     alpha: int, beta: int) -> bool:
         """Delta pruning – skip captures that cannot improve alpha."""
         if not board.is_capture(move):
             return False
             
-        victim = board.piece_at(move.to_square)
-        if not victim:
+        victim_type = board.piece_type_at(move.to_square)
+        if not victim_type:
             return False
             
-        victim_value = self.piece_values.get(victim.piece_type, 0)
+        victim_value = self.piece_values[victim_type]
         
         # If even after adding the victim's value we cannot reach alpha, prune
         if stand_pat + victim_value + 100 < alpha:
@@ -715,70 +1165,134 @@ class StrongChessEngine:
         
         return False
     
-    def order_moves(self, board: chess.Board, ply: int = 0, is_qsearch: bool = False) -> List[chess.Move]:
-        """Order moves for better alpha-beta pruning"""
+    def staged_moves(self, board: chess.Board, ply: int, tt_move: Optional[chess.Move]) -> Iterator[chess.Move]:
+        """Yield the hash move first, then generate and order the remaining moves lazily."""
+        if tt_move is not None and board.is_legal(tt_move):
+            yield tt_move
+        else:
+            tt_move = None
+        for move in self.order_moves(board, ply):
+            if move != tt_move:
+                yield move
+    
+    def order_moves(self, board: chess.Board, ply: int = 0,
+                    tt_move: Optional[chess.Move] = None) -> List[chess.Move]:
+        """Order moves for better alpha-beta pruning (quiescence orders its captures by SEE itself)"""
         moves = list(board.legal_moves)
         
-        # If very few moves, don't spend time sorting
+        # If very few moves, don't spend time sorting, but still try the hash move (or at
+        # the root the previous iteration's PV move) first
         if len(moves) <= 3:
+            for preferred in (tt_move, self.pv_move if ply == 0 else None):
+                if preferred is not None and preferred in moves:
+                    moves.remove(preferred)
+                    moves.insert(0, preferred)
+                    break
             return moves
         
         move_scores = []
+        piece_type_at = board.piece_type_at
+        see_values = self.see_values
+        piece_values = self.piece_values
+        history_table = self.history_table
+        bb_squares = chess.BB_SQUARES
+        occupied_them = board.occupied_co[not board.turn]
+        ep_square = board.ep_square
+        pv_move = self.pv_move if ply == 0 else None
+        killer_first, killer_second = self.killer_moves[ply]
+        counter_move = 0
+        if board.move_stack:
+            last_move = board.move_stack[-1]
+            if last_move:
+                counter_move = self.counter_moves[piece_type_at(last_move.to_square) << 6 | last_move.to_square]
+        opening = board.fullmove_number < 10
         
         for move in moves:
             score = 0
             
-            # 0. PV move from previous iteration (highest priority)
-            if self.pv_move == move:
+            # Classify the move once: piece types as ints (no Piece objects) and a
+            # bitboard capture test, with en passant as the only empty-square capture
+            from_square = move.from_square
+            to_square = move.to_square
+            from_type = piece_type_at(from_square)
+            if bb_squares[to_square] & occupied_them:
+                victim_type = piece_type_at(to_square)
+            elif to_square == ep_square and from_type == chess.PAWN and board.is_en_passant(move):
+                victim_type = chess.PAWN
+            else:
+                victim_type = None
+            
+            # 0. Hash move from TT (probed even when too shallow to cut off) and, at
+            #    the root, the PV move from the previous iteration (highest priority)
+            if move == tt_move or move == pv_move:
                 score = 20000
             
-            # 1. Captures (ordered by SEE)
-            if board.is_capture(move):
-                score += 10000 + self.see(board, move)
+            # 1. Captures (victim value minus attacker value). Taking a more valuable or
+            #    equal piece never loses material; anything else is checked by SEE and,
+            #    if the exchange loses, ordered after the killer and counter moves
+            if victim_type:
+                gain = see_values[victim_type] - see_values[from_type]
+                if gain >= 0:
+                    score += 10000 + gain
+                else:
+                    exchange = self.see(board, move)
+                    score += 10000 + gain if exchange >= 0 else 2000 + exchange
             
             # 2. Promotions
             elif move.promotion:
-                score += 9000 + self.piece_values.get(move.promotion, 0)
+                score += 9000 + piece_values[move.promotion]
             
-            # 3. Killer moves (only in main search)
-            elif not is_qsearch:
-                if self.killer_moves[ply][0] == move:
+            # 3. Killer and counter moves
+            else:
+                move_code = encode_move(move)
+                if killer_first == move_code:
                     score += 8000
-                elif self.killer_moves[ply][1] == move:
+                elif killer_second == move_code:
                     score += 7000
-            
-            # 4. History heuristic (scaled down to not dominate)
-            if not board.is_capture(move) and not move.promotion:
-                score += self.history_table[move.from_square][move.to_square] // 10
+                elif counter_move == move_code:
+                    score += 6500
+                
+                # 4. History heuristic (scaled down to not dominate)
+                score += history_table[from_square << 6 | to_square] // 10
             
             # 5. Simple positional bonuses
-            piece = board.piece_at(move.from_square)
-            if piece:
-                # Center control
-                to_file = chess.square_file(move.to_square)
-                to_rank = chess.square_rank(move.to_square)
-                
+            if from_type:
                 # Bonus for moving to center
-                if 2 <= to_file <= 5 and 2 <= to_rank <= 5:
+                if bb_squares[to_square] & BB_CENTER_16:
                     score += 50
                 
                 # Bonus for developing pieces early
-                if board.fullmove_number < 10:
-                    if piece.piece_type in [chess.KNIGHT, chess.BISHOP]:
-                        if move.from_square in [chess.B1, chess.G1, chess.B8, chess.G8,
-                                               chess.C1, chess.F1, chess.C8, chess.F8]:
-                            score += 100
+                if (opening and (from_type == chess.KNIGHT or from_type == chess.BISHOP) and
+                        bb_squares[from_square] & BB_MINOR_HOMES):
+                    score += 100
                 
                 # Bonus for castling
-                if board.is_castling(move):
+                if from_type == chess.KING and board.is_castling(move):
                     score += 300
             
             move_scores.append((move, score))
         
         # Sort by score (highest first)
-        move_scores.sort(key=lambda x: x[1], reverse=True)
+        move_scores.sort(key=itemgetter(1), reverse=True)
         return [move for move, _ in move_scores]
     
+    def book_move(self, board: chess.Board) -> Optional[chess.Move]:
+        """Weighted random move from the opening book, or None if out of book (or no book)."""
+        if board.fullmove_number > self.book_max_fullmove:
+            return None
+        if self.book is None:
+            if not os.path.exists(BOOK_PATH):
+                return None
+            try:
+                self.book = chess.polyglot.open_reader(BOOK_PATH)
+            except OSError as e:
+                print(f"⚠️  Could not open opening book {BOOK_PATH}: {e}")
+                return None
+        try:
+            return self.book.weighted_choice(board).move
+        except IndexError:
+            return None
+    
     def get_best_move(self, fen: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
         """Get the best move for given position with time management"""
         try:
@@ -787,23 +1301,43 @@ class StrongChessEngine:
             if board.is_game_over():
                 return None, None, None
             
+            # Opening book: a weighted book move skips the search entirely
+            book_move = self.book_move(board)
+            if book_move is not None:
+                promotion = chess.piece_symbol(book_move.promotion).lower() if book_move.promotion else None
+                print(f"📖 Book move: {book_move.uci()}")
+                return chess.square_name(book_move.from_square), chess.square_name(book_move.to_square), promotion
+            
+            # Same position at the same difficulty: reuse the finished search.
+            # EPD drops the move counters, which don't change the result.
+            cache_key = (board.epd(), self.difficulty)
+            cached = self.move_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ Cached engine move: {cached[0]} -> {cached[1]}")
+                return cached
+            
             print(f"🤖 Engine thinking (difficulty: {self.difficulty}, time limit: {self.max_time}s)...")
             
             # Determine search depth based on position complexity
-            legal_moves = list(board.legal_moves)
+            # (only the count is needed, so don't build a list of Move objects)
+            num_legal_moves = board.legal_moves.count()
             
             # Adjust depth based on position complexity
-            if len(legal_moves) > 40:  # Very complex position
+            if num_legal_moves > 40:  # Very complex position
                 effective_depth = min(self.target_depth - 1, 4)
-            elif len(legal_moves) > 25:  # Complex position
+            elif num_legal_moves > 25:  # Complex position
                 effective_depth = min(self.target_depth, 5)
             else:  # Normal position
                 effective_depth = self.target_depth
             
-            print(f"  Position has {len(legal_moves)} legal moves, searching to depth {effective_depth}")
+            print(f"  Position has {num_legal_moves} legal moves, searching to depth {effective_depth}")
             
-            # Perform iterative deepening search
-            best_move, eval_score = self.iterative_deepening_search(board, effective_depth)
+            # Perform iterative deepening search, split across processes when cores allow
+            if self.search_workers > 1 and self.difficulty >= 3 and num_legal_moves > 1:
+                best_move, eval_score = self.parallel_root_search(board, effective_depth)
+            else:
+                best_move, eval_score = self.iterative_deepening_search(board, effective_depth)
+            searched = best_move is not None and not self.timeout
             
             # If search timed out or found no move, use fallback
             if not best_move or self.timeout:
@@ -811,32 +1345,37 @@ class StrongChessEngine:
                 
                 # Try to use the last best move found
                 if not best_move:
-                    # Order moves and pick the best one based on simple evaluation
-                    ordered_moves = self.order_moves(board)
+                    # Score every move by the material it wins (no push/pop needed)
+                    def material_gain(move):
+                        gain = 0
+                        if board.is_capture(move):
+                            victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                            gain += self.piece_values[victim]
+                        if move.promotion:
+                            gain += self.piece_values[move.promotion] - self.piece_values[chess.PAWN]
+                        return gain
                     
-                    # Evaluate first few moves quickly
-                    best_score = -math.inf
-                    for move in ordered_moves[:5]:  # Only check first 5
-                        board.push(move)
-                        score = self.evaluate_position(board)
-                        board.pop()
-                        
-                        if score > best_score:
-                            best_score = score
-                            best_move = move
+                    # max keeps the first maximum, so ties go to the best-ordered move
+                    best_move = max(self.order_moves(board), key=material_gain)
             
             # Final fallback: random move
             if not best_move:
                 print("  Using random move as fallback")
-                best_move = random.choice(list(board.legal_moves))
+                best_move = random_legal_move(board)
             
             # Convert move to string format
             from_sq = chess.square_name(best_move.from_square)
             to_sq = chess.square_name(best_move.to_square)
             promotion = chess.piece_symbol(best_move.promotion).lower() if best_move.promotion else None
             
-            elapsed = time.time() - self.start_time if self.start_time else 0
-            print(f"✅ Engine move: {from_sq} -> {to_sq} (eval: {eval_score:.1f}, time: {elapsed:.1f}s)")
+            elapsed = time.monotonic() - self.start_time if self.start_time else 0
+            print(f"✅ Engine move: {from_sq} -> {to_sq} (eval: {eval_score / 100:+.2f}, time: {elapsed:.1f}s)")
+            
+            # Only cache complete searches, never timeout or fallback moves
+            if searched:
+                self.move_cache[cache_key] = (from_sq, to_sq, promotion)
+                if len(self.move_cache) > self.move_cache_size:
+                    self.move_cache.popitem(last=False)
             
             return from_sq, to_sq, promotion
             
@@ -851,7 +1390,7 @@ class StrongChessEngine:
                 if board.is_game_over():
                     return None, None, None
                 
-                move = random.choice(list(board.legal_moves))
+                move = random_legal_move(board)
                 from_sq = chess.square_name(move.from_square)
                 to_sq = chess.square_name(move.to_square)
                 promotion = chess.piece_symbol(move.promotion).lower() if move.promotion else None
@@ -861,6 +1400,23 @@ class StrongChessEngine:
                 return None, None, None
 
 
+def search_root_moves(fen: str, root_moves: List[str], depth: int, difficulty: int,
+                      time_limit: float, root_alpha: int = -INF) -> Tuple[Optional[str], int, int, bool]:
+    """
+    Worker entry point for parallel_root_search: search only the given root moves (UCI)
+    with a private engine, ignoring scores at or below root_alpha.
+    Returns (best move UCI or None, value, nodes searched, timed out).
+    """
+    # Workers stay quiet; the parent process reports the merged result
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = StrongChessEngine(difficulty=difficulty)
+        engine.max_time = time_limit
+        engine.root_moves = [chess.Move.from_uci(uci) for uci in root_moves]
+        engine.root_alpha = root_alpha
+        best_move, value = engine.iterative_deepening_search(chess.Board(fen), depth)
+    return (best_move.uci() if best_move else None), value, engine.nodes_searched, engine.timeout
+
+
 # Test the engine
 if __name__ == "__main__":
     print("🧪 Testing Optimized Chess Engine...")
@@ -886,3 +1442,37 @@ if __name__ == "__main__":
                 print(f"⚠️  Warning: Slightly over time limit ({elapsed:.1f}s > {engine.max_time}s)")
         else:
             print(f"❌ Difficulty {difficulty} test failed")
+    
+    # Mate found inside quiescence is scored by its distance from the root
+    print(f"\n{'='*50}")
+    print("Testing quiescence mate distance")
+    print('='*50)
+    engine = StrongChessEngine(difficulty=1)
+    board = chess.Board("3r2k1/5ppp/8/8/8/8/8/3R2K1 w - - 0 1")  # Rxd8 is mate
+    engine.set_root(board)
+    value = engine.quiescence(board, -INF, INF, ply=6)
+    if value == MATE_SCORE - 7:
+        print(f"✅ Quiescence mate at ply 7 scores {value}")
+    else:
+        print(f"❌ Quiescence mate at ply 7 scores {value}, expected {MATE_SCORE - 7}")
+    
+    # Root splitting must still search the other moves when the first one gets mated
+    print(f"\n{'='*50}")
+    print("Testing root splitting when the first move loses to mate")
+    print('='*50)
+    engine = StrongChessEngine(difficulty=3)
+    engine.search_workers = 2
+    test_fen = "4r1k1/3n1ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1"  # Rxd7?? allows Re1#
+    result = engine.get_best_move(test_fen)
+    board = chess.Board(test_fen)
+    board.push(chess.Move.from_uci(result[0] + result[1] + (result[2] or "")))
+    allows_mate = False
+    for reply in list(board.legal_moves):
+        board.push(reply)
+        allows_mate = allows_mate or board.is_checkmate()
+        board.pop()
+    if not allows_mate:
+        print(f"✅ Split search avoided the mate: {result[0]} -> {result[1]}")
+    else:
+        print(f"❌ Split search played {result[0]} -> {result[1]}, which allows mate in one")
+    engine.executor.shutdown()